@@ -0,0 +1,155 @@
+"""
+KeyboardHook module for global hotkeys through a raw low-level keyboard hook
+(SetWindowsHookExW / WH_KEYBOARD_LL). Windows only.
+"""
+
+import queue
+import threading
+import ctypes
+import ctypes.wintypes
+
+WH_KEYBOARD_LL = 13
+WM_KEYDOWN = 0x0100
+WM_SYSKEYDOWN = 0x0104
+WM_QUIT = 0x0012
+LLKHF_INJECTED = 0x10
+
+KEY_CODES = {
+    "tab": (0x09,),
+    "caps lock": (0x14,),
+    "shift": (0x10, 0xA0, 0xA1),
+    "ctrl": (0x11, 0xA2, 0xA3),
+    "alt": (0x12, 0xA4, 0xA5),
+    "esc": (0x1B,),
+    "f10": (0x79,),
+}
+
+
+class KBDLLHOOKSTRUCT(ctypes.Structure):
+    """Windows low-level keyboard hook event struct."""
+    _fields_ = [
+        ("vkCode", ctypes.wintypes.DWORD),
+        ("scanCode", ctypes.wintypes.DWORD),
+        ("flags", ctypes.wintypes.DWORD),
+        ("time", ctypes.wintypes.DWORD),
+        ("dwExtraInfo", ctypes.c_size_t),
+    ]
+
+
+LowLevelKeyboardProc = ctypes.WINFUNCTYPE(
+    ctypes.wintypes.LPARAM,
+    ctypes.c_int,
+    ctypes.wintypes.WPARAM,
+    ctypes.wintypes.LPARAM,
+)
+
+_user32 = ctypes.WinDLL("user32", use_last_error=True)
+_kernel32 = ctypes.WinDLL("kernel32", use_last_error=True)
+
+_user32.SetWindowsHookExW.argtypes = [
+    ctypes.c_int,
+    LowLevelKeyboardProc,
+    ctypes.wintypes.HINSTANCE,
+    ctypes.wintypes.DWORD,
+]
+_user32.SetWindowsHookExW.restype = ctypes.wintypes.HHOOK
+_user32.CallNextHookEx.argtypes = [
+    ctypes.wintypes.HHOOK,
+    ctypes.c_int,
+    ctypes.wintypes.WPARAM,
+    ctypes.wintypes.LPARAM,
+]
+_user32.CallNextHookEx.restype = ctypes.wintypes.LPARAM
+_user32.UnhookWindowsHookEx.argtypes = [ctypes.wintypes.HHOOK]
+_user32.GetMessageW.argtypes = [
+    ctypes.POINTER(ctypes.wintypes.MSG),
+    ctypes.wintypes.HWND,
+    ctypes.wintypes.UINT,
+    ctypes.wintypes.UINT,
+]
+_user32.GetMessageW.restype = ctypes.wintypes.BOOL
+_user32.PostThreadMessageW.argtypes = [
+    ctypes.wintypes.DWORD,
+    ctypes.wintypes.UINT,
+    ctypes.wintypes.WPARAM,
+    ctypes.wintypes.LPARAM,
+]
+_user32.GetAsyncKeyState.argtypes = [ctypes.c_int]
+_user32.GetAsyncKeyState.restype = ctypes.wintypes.SHORT
+_kernel32.GetModuleHandleW.argtypes = [ctypes.wintypes.LPCWSTR]
+_kernel32.GetModuleHandleW.restype = ctypes.wintypes.HMODULE
+
+
+def is_pressed(key):
+    """Return True if any virtual key of key name is currently held down."""
+    return any(
+        _user32.GetAsyncKeyState(vk) & 0x8000 for vk in KEY_CODES[key]
+    )
+
+
+class KeyboardHook:
+    """Calls registered callbacks on key presses seen by a low-level hook."""
+
+    def __init__(self):
+        self._callbacks = {}
+        self._events = queue.SimpleQueue()
+        self._proc = LowLevelKeyboardProc(self._hook_proc)
+        self._hook = None
+        self._pump_thread_id = None
+        self._error = None
+        self._ready = threading.Event()
+
+    def on_press_key(self, key, callback):
+        """Register callback(vk) for presses of key name (see KEY_CODES)."""
+        for vk in KEY_CODES[key]:
+            self._callbacks.setdefault(vk, []).append(callback)
+
+    def start(self):
+        """Install the hook and start the message pump and dispatch threads."""
+        threading.Thread(target=self._pump, daemon=True).start()
+        threading.Thread(target=self._dispatch, daemon=True).start()
+        self._ready.wait()
+        if self._error:
+            self._events.put(None)
+            raise self._error
+
+    def unhook(self):
+        """Remove the hook and stop both threads."""
+        if self._pump_thread_id is not None:
+            _user32.PostThreadMessageW(self._pump_thread_id, WM_QUIT, 0, 0)
+        self._events.put(None)
+
+    def _hook_proc(self, n_code, w_param, l_param):
+        """Low-level hook callback: only queue the vk code and pass on."""
+        if n_code == 0 and w_param in (WM_KEYDOWN, WM_SYSKEYDOWN):
+            event = KBDLLHOOKSTRUCT.from_address(l_param)
+            if not event.flags & LLKHF_INJECTED:
+                self._events.put_nowait(event.vkCode)
+        return _user32.CallNextHookEx(self._hook, n_code, w_param, l_param)
+
+    def _pump(self):
+        """Install the hook and run the message loop it is delivered on."""
+        self._pump_thread_id = _kernel32.GetCurrentThreadId()
+        self._hook = _user32.SetWindowsHookExW(
+            WH_KEYBOARD_LL, self._proc, _kernel32.GetModuleHandleW(None), 0
+        )
+        if not self._hook:
+            self._error = ctypes.WinError(ctypes.get_last_error())
+            self._ready.set()
+            return
+        self._ready.set()
+
+        msg = ctypes.wintypes.MSG()
+        while _user32.GetMessageW(ctypes.byref(msg), None, 0, 0) > 0:
+            pass
+
+        _user32.UnhookWindowsHookEx(self._hook)
+
+    def _dispatch(self):
+        """Translate queued vk codes into registered callback calls."""
+        while True:
+            vk = self._events.get()
+            if vk is None:
+                return
+            for callback in self._callbacks.get(vk, ()):
+                callback(vk)
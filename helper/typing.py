@@ -3,7 +3,9 @@ CharacterTyper module for simulating keyboard typing with different styles
 (INSTANT, HUMAN_LIKE, MACHINE_GUN). Works on Windows and X11.
 """
 
+import os
 import time
+import queue
 import random
 import platform
 import threading
@@ -13,9 +15,37 @@ from enum import Enum, auto
 
 try:
     import Xlib.display
+    from Xlib import X
+    from Xlib.ext import xtest
 except ImportError:
     Xlib = None
 
+if platform.system() == "Windows":
+    # Raise the system timer resolution so short sleeps are not rounded up
+    # to the default ~15.6 ms scheduler tick.
+    ctypes.windll.winmm.timeBeginPeriod(1)
+
+SPIN_THRESHOLD = 0.002
+THREAD_PRIORITY_ABOVE_NORMAL = 1
+INPUT_KEYBOARD = 1
+KEYEVENTF_KEYUP = 0x2
+KEYEVENTF_UNICODE = 0x4
+VK_RETURN = 0x0D
+VK_SHIFT = 0x10
+PUNCTUATION_DELAYS = {
+    ",": 1.5, ";": 1.5, ":": 1.5,
+    ".": 2.0, "!": 2.0, "?": 2.0,
+}
+
+
+def _wait_until(deadline):
+    """Sleep until perf_counter() reaches deadline, spinning the last ms."""
+    remaining = deadline - time.perf_counter()
+    if remaining > SPIN_THRESHOLD:
+        time.sleep(remaining - SPIN_THRESHOLD / 2)
+    while time.perf_counter() < deadline:
+        pass
+
 
 class TypingMode(Enum):
     """Typing behavior modes."""
@@ -36,21 +66,59 @@ class KEYBDINPUT(ctypes.Structure):
 class CharacterTyper:
     """Simulates typing text character by character."""
 
+    QUEUE_SIZE = 4
+
     def __init__(self):
         self._typing_delay = (0.05, 0.2)
         self._error_rate = 0.005
         self._mode = TypingMode.HUMAN_LIKE
-        self._stop_event = threading.Event()
-        self._typing_thread = None
+        self._stop_flag = False
+        self._queue = queue.Queue(maxsize=self.QUEUE_SIZE)
+        self._mode_planners = {
+            TypingMode.INSTANT: self._plan_instant,
+            TypingMode.HUMAN_LIKE: self._plan_human,
+            TypingMode.MACHINE_GUN: self._plan_machine_gun,
+        }
 
         if platform.system() == "Windows":
+            user32 = ctypes.WinDLL("user32", use_last_error=True)
+            self._user32_send_input = user32.SendInput
+            self._user32_send_input.argtypes = [
+                ctypes.wintypes.UINT,
+                ctypes.c_void_p,
+                ctypes.c_int,
+            ]
+            self._user32_send_input.restype = ctypes.wintypes.UINT
+            self._key_pair = self._windows_inputs([
+                (0, KEYEVENTF_UNICODE),
+                (0, KEYEVENTF_UNICODE | KEYEVENTF_KEYUP),
+            ])
+            self._enter_inputs = self._windows_inputs([
+                (VK_RETURN, 0),
+                (VK_RETURN, KEYEVENTF_KEYUP),
+            ])
+            self._shift_enter_inputs = self._windows_inputs([
+                (VK_SHIFT, 0),
+                (VK_RETURN, 0),
+                (VK_RETURN, KEYEVENTF_KEYUP),
+                (VK_SHIFT, KEYEVENTF_KEYUP),
+            ])
             self._send_input = self._windows_send_input
+            self._send_batch = self._windows_send_batch
         elif Xlib:
             self._display = Xlib.display.Display()
+            self._kc_cache = {}
+            self._shift_keycode = self._display.keysym_to_keycode(0xFFE1)
             self._send_input = self._x11_send_input
+            self._send_batch = self._x11_send_batch
         else:
             raise RuntimeError("Unsupported platform or missing Xlib.")
 
+        self._typing_thread = threading.Thread(
+            target=self._typing_worker, daemon=True
+        )
+        self._typing_thread.start()
+
 
     class INPUT(ctypes.Structure):
         """Windows generic input struct."""
@@ -60,89 +128,107 @@ class CharacterTyper:
             ("padding", ctypes.c_ubyte * 8),
         ]
 
-    def _windows_send_input(self, char):
-        """Send key input on Windows."""
-        input_keyboard_const = 1
-        keyeventf_unicode_flag = 0x4
-        keyeventf_keyup_flag = 0x2
-
-        i = self.INPUT()
-        i.input_type = input_keyboard_const
-
+    def _windows_inputs(self, events):
+        """Build a keyboard INPUT array from (wVk, dwFlags) pairs."""
+        inputs = (self.INPUT * len(events))()
+        for inp, (vk, flags) in zip(inputs, events):
+            inp.input_type = INPUT_KEYBOARD
+            inp.ki.wVk = vk
+            inp.ki.dwFlags = flags
+        return inputs
+
+    def _windows_send_input(self, char, shift_enter=False):
+        """Send key input on Windows (down and up in one SendInput call)."""
         if char == "\n":
-            i.ki.wVk = 0x0D
-            i.ki.wScan = 0
-            i.ki.dwFlags = 0
+            inputs = (
+                self._shift_enter_inputs
+                if shift_enter
+                else self._enter_inputs
+            )
         else:
-            i.ki.wVk = 0
-            i.ki.wScan = ord(char)
-            i.ki.dwFlags = keyeventf_unicode_flag
+            inputs = self._key_pair
+            inputs[0].ki.wScan = inputs[1].ki.wScan = ord(char)
 
-        i.ki.time = 0
-        i.ki.dwExtraInfo = None
+        self._user32_send_input(
+            len(inputs), inputs, ctypes.sizeof(self.INPUT)
+        )
 
-        ctypes.windll.user32.SendInput(1, ctypes.byref(i), ctypes.sizeof(i))
-        time.sleep(0.01)
-        i.ki.dwFlags |= keyeventf_keyup_flag
-        ctypes.windll.user32.SendInput(1, ctypes.byref(i), ctypes.sizeof(i))
+    def _windows_send_batch(self, chars, shift_enter=False):
+        """Send key down/up events for all chars in a single SendInput call."""
+        events = []
+        for char in chars:
+            if char == "\n":
+                if shift_enter:
+                    events.append((VK_SHIFT, 0, 0))
+                events.append((VK_RETURN, 0, 0))
+                events.append((VK_RETURN, 0, KEYEVENTF_KEYUP))
+                if shift_enter:
+                    events.append((VK_SHIFT, 0, KEYEVENTF_KEYUP))
+            else:
+                code = ord(char)
+                events.append((0, code, KEYEVENTF_UNICODE))
+                events.append(
+                    (0, code, KEYEVENTF_UNICODE | KEYEVENTF_KEYUP)
+                )
 
-    def _x11_send_input(self, char):
-        """Send key input on X11 (Linux)."""
-        if char == "\n":
-            keysym = 0xFF0D
-        else:
-            keysym = self._display.keysym(char)
-            if keysym == 0:
-                keysym = ord(char)
-
-        window = self._display.get_input_focus()._data["focus"]  # pylint: disable=protected-access
-        self._display.sync()
-
-        # pylint: disable=protected-access
-        window.send_event(
-            self._display._key_press_event(
-                detail=self._display.keysym_to_keycode(keysym),
-                time=0,
-                root=self._display.screen().root,
-                window=window,
-                same_screen=1,
-                child=self._display.create_resource_object("window", 0),
-                root_x=0,
-                root_y=0,
-                event_x=0,
-                event_y=0,
-                state=0,
-            ),
-            propagate=True,
-        )
+        inputs = (self.INPUT * len(events))()
+        for inp, (vk, scan, flags) in zip(inputs, events):
+            inp.input_type = INPUT_KEYBOARD
+            inp.ki.wVk = vk
+            inp.ki.wScan = scan
+            inp.ki.dwFlags = flags
 
-        time.sleep(0.01)
-
-        window.send_event(
-            self._display._key_release_event(
-                detail=self._display.keysym_to_keycode(keysym),
-                time=0,
-                root=self._display.screen().root,
-                window=window,
-                same_screen=1,
-                child=self._display.create_resource_object("window", 0),
-                root_x=0,
-                root_y=0,
-                event_x=0,
-                event_y=0,
-                state=0,
-            ),
-            propagate=True,
+        self._user32_send_input(
+            len(inputs), inputs, ctypes.sizeof(self.INPUT)
         )
 
-        self._display.sync()
+    def _kc(self, char):
+        """Return the X11 keycode for char, caching the lookup."""
+        keycode = self._kc_cache.get(char)
+        if keycode is None:
+            if char == "\n":
+                keysym = 0xFF0D
+            else:
+                keysym = self._display.keysym(char)
+                if keysym == 0:
+                    keysym = ord(char)
+            keycode = self._kc_cache[char] = self._display.keysym_to_keycode(
+                keysym
+            )
+        return keycode
+
+    def _x11_fake_key(self, char, shift_enter=False):
+        """Queue an XTEST key press and release for char (no flush)."""
+        keycode = self._kc(char)
+        if not keycode:
+            return
+        shift = char == "\n" and shift_enter
+        if shift:
+            xtest.fake_input(self._display, X.KeyPress, self._shift_keycode)
+        xtest.fake_input(self._display, X.KeyPress, keycode)
+        xtest.fake_input(self._display, X.KeyRelease, keycode)
+        if shift:
+            xtest.fake_input(
+                self._display, X.KeyRelease, self._shift_keycode
+            )
+
+    def _x11_send_input(self, char, shift_enter=False):
+        """Send key input on X11 (Linux)."""
+        self._x11_fake_key(char, shift_enter)
+        self._display.flush()
 
-    def _simulate_typo(self, text, i):
-        """Simulate a typo and correction."""
+    def _x11_send_batch(self, chars, shift_enter=False):
+        """Send key input for all chars on X11 with a single flush."""
+        for char in chars:
+            self._x11_fake_key(char, shift_enter)
+        self._display.flush()
+
+    def _plan_typo(self, text, is_alpha, i, plan):
+        """Append a typo and its correction to plan; return chars covered."""
         typo_length = random.randint(1, min(3, len(text) - i))
         typo_chars = []
         for j in range(typo_length):
-            if i + j < len(text) and text[i + j].isalpha():
+            if is_alpha[i + j]:
                 typo_char = chr(
                     ord(text[i + j]) + random.choice([-2, -1, 1, 2])
                 )
@@ -150,70 +236,123 @@ class CharacterTyper:
             else:
                 typo_chars.append(text[i + j])
 
-        for typo_char in typo_chars:
-            self._send_input(typo_char)
-            time.sleep(random.uniform(*self._typing_delay))
-        time.sleep(random.uniform(0.1, 0.3))
+        plan.append(("".join(typo_chars), random.uniform(0.1, 0.3)))
+        plan.append(("\x08" * typo_length, random.uniform(0.05, 0.15)))
+        plan.append(
+            (text[i:i + typo_length], random.uniform(*self._typing_delay))
+        )
 
-        for _ in typo_chars:
-            self._send_input("\x08")
-            time.sleep(random.uniform(0.05, 0.15))
+        return typo_length
 
-        for j in range(typo_length):
-            if i + j < len(text):
-                self._send_input(text[i + j])
-                time.sleep(random.uniform(*self._typing_delay))
+    def _simulate_typing(self, text, shift_enter=False):
+        """Plan text for the current mode, then run the plan."""
+        self._run_plan(self._mode_planners[self._mode](text), shift_enter)
 
-        return typo_length
+    def _run_plan(self, plan, shift_enter=False):
+        """Send each (chars, delay) entry, pacing by absolute deadlines."""
+        deadline = time.perf_counter()
+        for chars, delay in plan:
+            if self._stop_flag:
+                return
 
-    def _simulate_typing(self, text):
-        """Simulate typing text with delays and optional typos."""
-        last_char = None
+            if len(chars) == 1:
+                self._send_input(chars, shift_enter)
+            else:
+                self._send_batch(chars, shift_enter)
+
+            if delay:
+                deadline += delay
+                _wait_until(deadline)
+
+    def _plan_instant(self, text):
+        """Plan the whole text as a single batch."""
+        return [(text, 0)] if text else []
+
+    def _plan_machine_gun(self, text):
+        """Plan text char by char at a steady minimum delay."""
+        delay = self._typing_delay[0]
+        return [(char, delay) for char in text]
+
+    def _plan_human(self, text):
+        """Plan text char by char with varied delays and optional typos."""
+        is_alpha = [char.isalpha() for char in text]
+        delays, typos = self._plan_delays(text, is_alpha)
+        plan = []
         i = 0
         while i < len(text):
-            char = text[i]
-            if self._stop_event.is_set():
-                return
-
-            if random.random() < self._error_rate and char.isalpha():
-                i += self._simulate_typo(text, i)
+            if typos[i]:
+                i += self._plan_typo(text, is_alpha, i, plan)
                 continue
 
-            self._send_input(char)
-
-            if self._mode == TypingMode.INSTANT:
-                pass
-            if self._mode == TypingMode.HUMAN_LIKE:
-                delay = random.uniform(*self._typing_delay)
-                if char in ",;:":
-                    delay *= 1.5
-                elif char in ".!?":
-                    delay *= 2.0
-                if char == last_char:
-                    delay *= 0.8
-                time.sleep(delay)
-            if self._mode == TypingMode.MACHINE_GUN:
-                time.sleep(self._typing_delay[0])
-
-            last_char = char
+            plan.append((text[i], delays[i]))
             i += 1
 
-    def type_text(self, text):
-        """Start typing text asynchronously."""
-        if self._typing_thread and self._typing_thread.is_alive():
-            self._typing_thread.join()
+        return plan
+
+    def _plan_delays(self, text, is_alpha):
+        """Precompute per-character delays and typo rolls for the whole text."""
+        min_delay, max_delay = self._typing_delay
+        error_rate = self._error_rate
+        uniform = random.uniform
+        rand = random.random
+        multipliers = [PUNCTUATION_DELAYS.get(char, 1.0) for char in text]
+        for i in range(1, len(text)):
+            if text[i] == text[i - 1]:
+                multipliers[i] *= 0.8
+
+        delays = [uniform(min_delay, max_delay) * m for m in multipliers]
+        typos = [alpha and rand() < error_rate for alpha in is_alpha]
+        return delays, typos
+
+    def _typing_worker(self):
+        """Type queued texts one after another on a dedicated thread."""
+        if platform.system() == "Windows":
+            self._raise_thread_priority()
+
+        while True:
+            text, shift_enter = self._queue.get()
+            try:
+                self._simulate_typing(text, shift_enter)
+            except Exception as e:  # pylint: disable=broad-except
+                print(f"[ERROR] Typing failed: {e}")
+            finally:
+                self._queue.task_done()
+
+    @staticmethod
+    def _raise_thread_priority():
+        """Raise current thread priority and pin it to the last CPU (Windows)."""
+        kernel32 = ctypes.WinDLL("kernel32", use_last_error=True)
+        kernel32.GetCurrentThread.restype = ctypes.wintypes.HANDLE
+        kernel32.SetThreadPriority.argtypes = [
+            ctypes.wintypes.HANDLE,
+            ctypes.c_int,
+        ]
+        kernel32.SetThreadAffinityMask.argtypes = [
+            ctypes.wintypes.HANDLE,
+            ctypes.c_size_t,
+        ]
+        kernel32.SetThreadAffinityMask.restype = ctypes.c_size_t
+
+        thread = kernel32.GetCurrentThread()
+        cpu = min(os.cpu_count() or 1, 64) - 1
+        kernel32.SetThreadPriority(thread, THREAD_PRIORITY_ABOVE_NORMAL)
+        kernel32.SetThreadAffinityMask(thread, 1 << cpu)
 
-        self._stop_event.clear()
-        self._typing_thread = threading.Thread(
-            target=self._simulate_typing, args=(text,), daemon=True
-        )
-        self._typing_thread.start()
+    def type_text(self, text, shift_enter=False):
+        """Queue text to be typed asynchronously (newlines as Shift+Enter)."""
+        self._queue.put((text, shift_enter))
 
     def stop_typing(self):
-        """Stop typing immediately."""
-        self._stop_event.set()
-        if self._typing_thread:
-            self._typing_thread.join()
+        """Stop typing immediately and discard queued texts."""
+        self._stop_flag = True
+        while True:
+            try:
+                self._queue.get_nowait()
+            except queue.Empty:
+                break
+            self._queue.task_done()
+        self._queue.join()
+        self._stop_flag = False
 
     def set_typing_speed(self, min_delay=0.05, max_delay=0.2):
         """Set typing speed range (min/max delay)."""
@@ -228,10 +367,9 @@ class CharacterTyper:
         self._mode = mode
 
     def wait_until_done(self):
-        """Block until typing is finished."""
-        if self._typing_thread:
-            self._typing_thread.join()
+        """Block until all queued typing is finished."""
+        self._queue.join()
 
-    def press_enter(self):
-        """Send Enter/Return key."""
-        self._send_input("\n")
+    def press_enter(self, shift=False):
+        """Send Enter/Return key (optionally as Shift+Enter)."""
+        self._send_input("\n", shift)
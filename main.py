@@ -1,5 +1,8 @@
-from typing import Optional
+from typing import Callable, Optional
+from collections import defaultdict, deque
 
+import os
+import queue
 import threading
 import random
 import time
@@ -9,6 +12,7 @@ import win32gui
 import win32con
 import keyboard
 
+from helper import hotkeys
 from helper.typing import CharacterTyper, TypingMode
 
 
@@ -27,6 +31,7 @@ class AutoTyper:
         self._short_path = short
         self._symbols = ["- ", "# "]
         self._used_lines = set()
+        self._remaining: defaultdict[str, deque[int]] = defaultdict(deque)
         self._modes = ["normal", "ladder", "paragraph", "beef", "demon"]
         self._mode_index = 0
         self._mode = self._modes[self._mode_index]
@@ -42,7 +47,20 @@ class AutoTyper:
         self._typing_modes = list(TypingMode)
         self._typing_mode_index = 1
         self._terminal_visible = True
+        self._cache: dict[str, tuple[Optional[float], list[str]]] = {}
+        for path in (wordlist, filler, short):
+            self._get_lines(path)
         self._typer = self._initialize_typer()
+        self._mode_handlers = {
+            "normal": self._handle_normal_mode,
+            "ladder": self._handle_ladder_mode,
+            "paragraph": self._handle_paragraph_mode,
+            "beef": self._handle_beef_mode,
+            "demon": self._handle_demon_mode,
+        }
+        self._retry_modes = {"normal", "demon"}
+        self._events: queue.Queue[Callable[[], object]] = queue.Queue(maxsize=8)
+        threading.Thread(target=self._event_worker, daemon=True).start()
 
     def _initialize_typer(self) -> CharacterTyper:
         """Init CharacterTyper with default speed and mode."""
@@ -52,15 +70,72 @@ class AutoTyper:
         ctypes.windll.kernel32.SetConsoleTitleW("kamo x vatos")
         return typer
 
-    def _get_random_line(self, path: str) -> Optional[str]:
-        """Return random line from file or None if missing/empty."""
+    def _event_worker(self) -> None:
+        """Run dispatched hotkey actions one at a time."""
+        while True:
+            action = self._events.get()
+            try:
+                action()
+            except Exception as e:  # pylint: disable=broad-except
+                print(f"[ERROR] Hotkey action failed: {e}")
+
+    def dispatch(self, action: Callable[[], object]) -> None:
+        """Queue action for the worker thread; drop it if the queue is full."""
+        try:
+            self._events.put_nowait(action)
+        except queue.Full:
+            pass
+
+    def _load_lines(self, path: str) -> list[str]:
+        """Return distinct non-empty stripped lines of file or [] if missing."""
         try:
             with open(path, "r", encoding="utf-8") as f:
                 lines = [line.strip() for line in f if line.strip()]
-            return random.choice(lines) if lines else None
+            return list(dict.fromkeys(lines))
+        except FileNotFoundError:
+            print(f"File not found: '{path}'")
+            return []
+
+    def _get_lines(self, path: str) -> list[str]:
+        """Return cached lines of file, reloading when its mtime changes."""
+        try:
+            mtime = os.stat(path).st_mtime
         except FileNotFoundError:
+            mtime = None
+
+        cached = self._cache.get(path)
+        if cached and cached[0] == mtime:
+            return cached[1]
+
+        if mtime is None:
             print(f"File not found: '{path}'")
-            return None
+            lines = []
+        else:
+            lines = self._load_lines(path)
+
+        self._cache[path] = (mtime, lines)
+        self._remaining.pop(path, None)
+        return lines
+
+    def _take_many(self, path: str, count: int) -> list[str]:
+        """Return count distinct unused lines of file ([] if too few)."""
+        lines = self._get_lines(path)
+        if len(lines) < count:
+            return []
+
+        remaining = self._remaining[path]
+        if len(remaining) < count:
+            pending = set(remaining)
+            refill = [i for i in range(len(lines)) if i not in pending]
+            random.shuffle(refill)
+            remaining.extend(refill)
+
+        return [lines[remaining.popleft()] for _ in range(count)]
+
+    def _take(self, path: str) -> Optional[str]:
+        """Return next unused line of file or None if missing/empty."""
+        taken = self._take_many(path, 1)
+        return taken[0] if taken else None
 
     def _handle_typing(
         self,
@@ -69,7 +144,6 @@ class AutoTyper:
         hold_shift: bool = False,
     ) -> None:
         """Type given text with case/transform options."""
-        time.sleep(0.05)
         if transform:
             text = transform(text)
 
@@ -78,16 +152,10 @@ class AutoTyper:
         elif self._case_mode == "lower":
             text = text.lower()
 
-        if hold_shift:
-            keyboard.press("shift")
-
-        self._typer.type_text(text)
+        self._typer.type_text(text, shift_enter=hold_shift)
         self._typer.wait_until_done()
 
-        self._typer.press_enter()
-
-        if hold_shift:
-            keyboard.release("shift")
+        self._typer.press_enter(shift=hold_shift)
 
     def _get_allowed_demon_types(self) -> list[str]:
         """Return demon types not yet used (short/middle/long)."""
@@ -167,78 +235,66 @@ class AutoTyper:
 
         self._is_typing = True
         try:
-            keyboard.release("tab")
-            time.sleep(0.05)
-
-            if self._mode == "normal":
-                self._handle_normal_mode()
-            elif self._mode == "ladder":
-                self._handle_ladder_mode()
-            elif self._mode == "paragraph":
-                self._handle_paragraph_mode()
-            elif self._mode == "beef":
-                self._handle_beef_mode()
-            elif self._mode == "demon":
-                self._handle_demon_mode()
+            if hotkeys.is_pressed("tab"):
+                keyboard.release("tab")
+                time.sleep(0.02)
+
+            handler = self._mode_handlers[self._mode]
+            attempts = 32 if self._mode in self._retry_modes else 1
+            for _attempt in range(attempts):
+                if handler():
+                    break
         finally:
             self._is_typing = False
 
-    def _handle_normal_mode(self) -> None:
-        """Handle typing in normal mode."""
+    def _handle_normal_mode(self) -> bool:
+        """Handle typing in normal mode. Return False to pick again."""
         source = self._wordlist_path
         choice = random.randint(1, 13)
         if choice == 1:
             source = self._filler_path
 
-        line = self._get_random_line(source)
-        if not line or line in self._used_lines:
-            return self.write_pack()
+        line = self._take(source)
+        if not line:
+            return False
 
         if choice == 2:
             line = random.choice(self._symbols) + line
 
-        self._used_lines.add(line)
         self._handle_typing(line)
+        return True
 
-    def _handle_ladder_mode(self) -> None:
+    def _handle_ladder_mode(self) -> bool:
         """Handle typing in ladder mode (word -> vertical)."""
-        line = self._get_random_line(self._wordlist_path)
-        if not line or line in self._used_lines:
-            return self.write_pack()
+        line = self._take(self._wordlist_path)
+        if not line:
+            return False
 
-        self._used_lines.add(line)
         self._handle_typing(line.replace(" ", "\n"), hold_shift=True)
+        return True
 
-    def _handle_paragraph_mode(self) -> None:
+    def _handle_paragraph_mode(self) -> bool:
         """Handle typing in paragraph mode."""
-        lines = []
-        for _ in range(30):
-            line = self._get_random_line(self._wordlist_path)
-            if line:
-                lines.append(line)
+        wordlist = self._get_lines(self._wordlist_path)
+        lines = random.sample(wordlist, min(30, len(wordlist)))
+        if not lines:
+            return False
 
         paragraph = " ".join(lines)
-        if lines:
-            self._used_lines.add(lines[-1])
         self._handle_typing(paragraph)
+        return True
 
-    def _handle_beef_mode(self) -> None:
+    def _handle_beef_mode(self) -> bool:
         """Handle typing in beef mode (combine two)."""
-        line1 = self._get_random_line(self._wordlist_path)
-        line2 = self._get_random_line(self._wordlist_path)
-
-        while not line1 or not line2 or line1 == line2:
-            line1 = self._get_random_line(self._wordlist_path)
-            line2 = self._get_random_line(self._wordlist_path)
-
-        combined = f"{line1} and {line2}"
-
-        self._used_lines.add(line1)
-        self._used_lines.add(line2)
+        lines = self._take_many(self._wordlist_path, 2)
+        if not lines:
+            return False
 
+        combined = " and ".join(lines)
         self._handle_typing(combined)
+        return True
 
-    def _handle_demon_mode(self) -> None:
+    def _handle_demon_mode(self) -> bool:
         """Handle typing in demon mode."""
         allowed = self._get_allowed_demon_types()
         selected = random.choice(allowed)
@@ -247,49 +303,43 @@ class AutoTyper:
         short = middle = long = None
 
         if selected == "short":
-            for _ in range(30):
-                line = self._get_random_line(self._short_path)
-                if line and line not in self._used_lines:
-                    short = line
-                    self._used_lines.add(line)
-                    break
+            short = self._take(self._short_path)
 
         elif selected == "middle":
-            for _ in range(30):
-                line = self._get_random_line(self._wordlist_path)
-                if line and line not in self._used_lines:
-                    middle = line
-                    self._used_lines.add(line)
-                    break
+            middle = self._take(self._wordlist_path)
 
         elif selected == "long":
-            lines = set()
-            attempts = 0
-            while len(lines) < 4 and attempts < 100:
-                line = self._get_random_line(self._wordlist_path)
-                if line and line not in self._used_lines:
-                    lines.add(line)
-                attempts += 1
-
-            if len(lines) == 4:
+            lines = self._take_many(self._wordlist_path, 4)
+            if lines:
                 long = " and ".join(lines)
-                self._used_lines.update(lines)
 
         parts = [p for p in [short, middle, long] if p]
-        if parts:
-            combined = " ".join(parts)
-            self._handle_typing(combined)
+        if not parts:
+            return False
+
+        combined = " ".join(parts)
+        self._handle_typing(combined)
+        return True
 
 
 def main() -> None:
     """Main entry: setup hotkeys and run event loop."""
     typer = AutoTyper()
-    keyboard.on_press_key("tab", lambda _: typer.write_pack())
-    keyboard.on_press_key("caps lock", lambda _: typer.toggle_case_mode())
-    keyboard.on_press_key("shift", lambda _: typer.cycle_mode())
-    keyboard.on_press_key("ctrl", lambda _: typer.cycle_typing_speed())
-    keyboard.on_press_key("alt", lambda _: typer.cycle_typing_mode())
-    keyboard.on_press_key("f10", lambda _: typer.toggle_terminal_visibility())
+    hook = hotkeys.KeyboardHook()
+    hook.on_press_key("tab", lambda _: typer.dispatch(typer.write_pack))
+    hook.on_press_key(
+        "caps lock", lambda _: typer.dispatch(typer.toggle_case_mode)
+    )
+    hook.on_press_key("shift", lambda _: typer.dispatch(typer.cycle_mode))
+    hook.on_press_key(
+        "ctrl", lambda _: typer.dispatch(typer.cycle_typing_speed)
+    )
+    hook.on_press_key(
+        "alt", lambda _: typer.dispatch(typer.cycle_typing_mode)
+    )
+    hook.on_press_key(
+        "f10", lambda _: typer.dispatch(typer.toggle_terminal_visibility)
+    )
 
     print("Press Tab to type random lines.")
     print("Press Caps Lock to toggle case mode (upper/lower).")
@@ -302,20 +352,18 @@ def main() -> None:
     print("Press Esc to exit.")
 
     exit_event = threading.Event()
-
-    def esc_listener():
-        keyboard.on_press_key("esc", lambda _: exit_event.set())
-
-    esc_thread = threading.Thread(target=esc_listener, daemon=True)
-    esc_thread.start()
+    hook.on_press_key("esc", lambda _: exit_event.set())
+    hook.start()
 
     try:
-        while not exit_event.is_set():
-            time.sleep(0.1)
+        # Wait in slices: an untimed wait cannot be interrupted by Ctrl+C
+        # on Windows.
+        while not exit_event.wait(1):
+            pass
     except KeyboardInterrupt:
         print("\n[INFO] Program terminated by user.")
     finally:
-        keyboard.unhook_all()
+        hook.unhook()
         print("[INFO] Cleanup complete. Goodbye!")
 
 